@@ -20,7 +20,6 @@
 """
 A collection of custom Gtk widgets used elsewhere in the App Menu
 """
-import subprocess
 import logging
 from typing import Optional, List
 from functools import reduce
@@ -33,7 +32,7 @@ from . import constants
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, Gio
 
 
 logger = logging.getLogger('qubes-appmenu')
@@ -94,9 +93,8 @@ class AppEntry(Gtk.ListBoxRow):
         Run application from related .desktop file for a given VM.
         :param vm: QubesVM
         """
-        # pylint: disable=consider-using-with
         command = self.app_info.get_command_for_vm(vm)
-        subprocess.Popen(command, stdin=subprocess.DEVNULL)
+        Gio.Subprocess.new(command, Gio.SubprocessFlags.NONE)
         self.get_toplevel().get_application().hide_menu()
 
 
@@ -20,12 +20,11 @@
 """
 Application page and related widgets and logic
 """
-import subprocess
 from typing import Optional
 
 from .desktop_file_manager import DesktopFileManager
 from .custom_widgets import LimitedWidthLabel, NetworkIndicator, \
-    SettingsEntry, VMRow, HoverEventBox
+    SettingsEntry, VMRow, HoverEventBox, compare_rows
 from .app_widgets import AppEntry, BaseAppEntry
 from .vm_manager import VMEntry, VMManager
 from .page_handler import MenuPage
@@ -33,7 +32,7 @@ from .utils import get_visible_child
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk
+from gi.repository import Gtk, Gdk, Gio
 
 
 class ControlRow(Gtk.ListBoxRow):
@@ -62,8 +61,8 @@ class ControlRow(Gtk.ListBoxRow):
         Run related app/script.
         """
         if self.command and self.is_sensitive():
-            # pylint: disable=consider-using-with
-            subprocess.Popen([self.command, str(vm)], stdin=subprocess.DEVNULL)
+            Gio.Subprocess.new([self.command, str(vm)],
+                               Gio.SubprocessFlags.NONE)
 
 
 class StartControlItem(ControlRow):
@@ -287,9 +286,11 @@ class AppPage(MenuPage):
             x.app_info.sort_name > y.app_info.sort_name)
         self.app_list.invalidate_sort()
 
-        vm_manager.register_new_vm_callback(self._vm_callback)
-        self.vm_list.set_sort_func(self._sort_vms)
-        self.vm_list.set_filter_func(self.toggle_buttons.filter_function)
+        VMRow.bulk_populate(self.vm_list, vm_manager.vms.values(),
+                            sort_func=self._sort_vms,
+                            filter_func=self.toggle_buttons.filter_function)
+        vm_manager.register_new_vm_callback(self._vm_callback,
+                                            call_for_existing=False)
 
         self.vm_list.connect('row-selected', self._selection_changed)
 
@@ -329,7 +330,7 @@ class AppPage(MenuPage):
                 if vmentry.vm_entry.power_state == "Running":
                     return -1
                 return 1
-        return vmentry.sort_order > other_entry.sort_order
+        return compare_rows(vmentry, other_entry)
 
     def set_sorting_order(self, sort_running: bool = False):
         self.sort_running = sort_running
@@ -372,12 +373,9 @@ class AppPage(MenuPage):
         Callback to be performed on all newly loaded VMEntry instances.
         """
         if vm_entry:
-            vm_row = VMRow(vm_entry)
-            vm_row.show_all()
-            vm_entry.entries.append(vm_row)
-            self.vm_list.add(vm_row)
-            self.vm_list.invalidate_filter()
-            self.vm_list.invalidate_sort()
+            # the listbox inserts the row at its sorted position and filters
+            # it, so there is no need to re-sort or re-filter all rows
+            VMRow.add_to_list(self.vm_list, vm_entry)
 
     def _is_app_fitting(self, appentry: BaseAppEntry):
         """
@@ -5,10 +5,10 @@ Main Application Menu class and helpers.
 """
 # pylint: disable=import-error
 import asyncio
+import functools
 import os
-import subprocess
 import sys
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Union, cast
 import importlib.resources
 import logging
 
@@ -24,6 +24,7 @@ from .custom_widgets import SelfAwareMenu
 from .vm_manager import VMManager
 from .page_handler import MenuPage
 from .constants import INITIAL_PAGE_FEATURE, SORT_RUNNING_FEATURE
+from .utils import clear_icon_cache
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -39,22 +40,50 @@ PAGE_NUMS = {
     "settings_page": 3
 }
 
+RESOURCE_PREFIX = '/org/qubesos/appmenu'
+# package data directory, resolved once at import
+PACKAGE_FILES = importlib.resources.files('qubes_menu')
+
 logger = logging.getLogger('qubes-appmenu')
 
+
+@functools.lru_cache(maxsize=None)
+def register_resources() -> bool:
+    """
+    Register the compiled GResource bundle (qubes-menu.gresource, produced
+    at build time from qubes-menu.gresource.xml) containing the glade file
+    and stylesheets. Registration happens only once per process.
+    :return: True if the bundle is available, False if the menu should fall
+    back to loading the source files (e.g. when running from a source tree)
+    """
+    bundle_ref = PACKAGE_FILES / 'qubes-menu.gresource'
+    try:
+        with importlib.resources.as_file(bundle_ref) as path:
+            Gio.resources_register(Gio.Resource.load(str(path)))
+    except (GLib.Error, FileNotFoundError):
+        return False
+    return True
+
+
 def load_theme(widget: Gtk.Widget, light_theme_path: str,
-               dark_theme_path: str):
+               dark_theme_path: str, from_resource: bool = False):
     """
     Load a dark or light theme to current screen, based on widget's
     current (system) defaults.
     :param widget: Gtk.Widget, preferably main window
     :param light_theme_path: path to file with light theme css
     :param dark_theme_path: path to file with dark theme css
+    :param from_resource: if True, provided paths are GResource paths and
+    not filesystem paths
     """
     path = light_theme_path if is_theme_light(widget) else dark_theme_path
 
     screen = Gdk.Screen.get_default()
     provider = Gtk.CssProvider()
-    provider.load_from_path(path)
+    if from_resource:
+        provider.load_from_resource(path)
+    else:
+        provider.load_from_path(path)
     Gtk.StyleContext.add_provider_for_screen(
         screen, provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
 
@@ -91,6 +120,7 @@ class AppMenu(Gtk.Application):
         self.initial_page = "app_page"
         self.sort_running = False
         self.start_in_background = False
+        self.use_resources = register_resources()
 
         self._add_cli_options()
 
@@ -104,13 +134,16 @@ class AppMenu(Gtk.Application):
         self.desktop_file_manager: Optional[DesktopFileManager] = None
         self.vm_manager: Optional[VMManager] = None
 
-        self.handlers: Dict[str, MenuPage] = {}
+        # pages are constructed lazily; until then, the dict contains
+        # a function that constructs the page
+        self.handlers: Dict[str, Union[MenuPage, Callable[[], MenuPage]]] = {}
 
         self.power_button: Optional[Gtk.Button] = None
 
         self.highlight_tag: Optional[str] = None
 
-        self.tasks = []
+        self.tasks: List[asyncio.Future] = []
+        self.exit_code = 0
 
     def _add_cli_options(self):
         self.add_main_option(
@@ -172,7 +205,6 @@ class AppMenu(Gtk.Application):
         Run xfce4's default logout button. Possible enhancement would be
         providing our own tiny program.
         """
-        # pylint: disable=consider-using-with
         current_environs = os.environ.get('XDG_CURRENT_DESKTOP', '').split(':')
 
         if 'KDE' in current_environs:
@@ -192,7 +224,10 @@ class AppMenu(Gtk.Application):
                 0  # timeout_msec
             )
         else:
-            subprocess.Popen('xfce4-session-logout', stdin=subprocess.DEVNULL)
+            # Gio.Subprocess spawns without forking the whole (large) menu
+            # process and reaps the child itself; stdin is /dev/null
+            Gio.Subprocess.new(['xfce4-session-logout'],
+                               Gio.SubprocessFlags.NONE)
 
     def do_activate(self, *args, **kwargs):
         """
@@ -203,6 +238,10 @@ class AppMenu(Gtk.Application):
         if not self.primary:
             self.perform_setup()
             self.primary = True
+            # the menu is a long-lived service: keep running even when the
+            # main window is hidden, so that subsequent invocations only
+            # need to (remotely) activate this instance
+            self.hold()
             assert self.main_window
             assert self.main_notebook
             if not self.start_in_background:
@@ -217,15 +256,15 @@ class AppMenu(Gtk.Application):
 
             # grab a focus on the initially selected page so that keyboard
             # navigation works
-            self.handlers[self.initial_page].page_widget.grab_focus()
+            self._get_page(self.initial_page).page_widget.grab_focus()
 
-            loop = asyncio.get_event_loop()
+            # the asyncio loop (gbulb) runs the application, so events are
+            # processed as soon as we return from here
             self.tasks = [
                 asyncio.ensure_future(self.dispatcher.listen_for_events()),
             ]
-
-            loop.run_until_complete(asyncio.wait(
-                self.tasks, return_when=asyncio.FIRST_EXCEPTION))
+            for task in self.tasks:
+                task.add_done_callback(self._task_done)
         else:
             if self.main_notebook:
                 self.main_notebook.set_current_page(
@@ -237,6 +276,31 @@ class AppMenu(Gtk.Application):
                 else:
                     self.main_window.present()
 
+    def _task_done(self, task: asyncio.Future):
+        """
+        Background tasks (such as the event dispatcher) should run as long
+        as the menu does; if one of them ends, the menu would show stale
+        data, so quit with an error (the service will be restarted).
+        """
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc:
+            logger.error('Background task failed: %s', repr(exc),
+                         exc_info=exc)
+        else:
+            logger.error('Background task unexpectedly finished')
+        self.exit_code = 1
+        self.quit()
+
+    def do_shutdown(self, *_args, **_kwargs):
+        """
+        Cancel all background tasks when the application is shutting down.
+        """
+        for task in self.tasks:
+            task.cancel()
+        Gtk.Application.do_shutdown(self)
+
     def hide_menu(self):
         """
         Unless CLI options specified differently, the menu will try to hide
@@ -244,29 +308,17 @@ class AppMenu(Gtk.Application):
         app or clicking outside the menu.
         """
         # reset search tab
-        self.handlers['search_page'].initialize_page()
+        search_page = self.handlers.get('search_page')
+        if isinstance(search_page, MenuPage):
+            search_page.initialize_page()
         if not self.keep_visible and self.main_window:
             self.main_window.hide()
 
-    def _key_press(self, _widget, event):
-        """
-        Keypress handler, to allow closing the menu with an ESC key and to fix
-        some issues with space (as we have search by default, we should not
-        react to space with launching an app).
-        """
-        if event.keyval == Gdk.KEY_Escape:
-            self.hide_menu()
-        if event.keyval == Gdk.KEY_space:
-            if not isinstance(self.get_active_window().get_focus(),
-                              Gtk.SearchEntry):
-                return True
-        return False
-
     def _focus_out(self, _widget, _event: Gdk.EventFocus):
         """
         Hide the menu on focus out, unless a right-click menu is open
         """
-        if SelfAwareMenu.OPEN_MENUS <= 0:
+        if not SelfAwareMenu.any_open():
             self.hide_menu()
 
     def initialize_state(self):
@@ -277,7 +329,9 @@ class AppMenu(Gtk.Application):
         widgets are realized and not on init.
         """
         for page in self.handlers.values():
-            page.initialize_page()
+            if isinstance(page, MenuPage):
+                page.initialize_page()
+        self._get_page(self.initial_page)
         if self.main_notebook:
             self.main_notebook.set_current_page(PAGE_NUMS[self.initial_page])
 
@@ -292,43 +346,49 @@ class AppMenu(Gtk.Application):
         self.fav_app_list = self.builder.get_object('fav_app_list')
         self.sys_tools_list = self.builder.get_object('sys_tools_list')
 
-        glade_path = (importlib.resources.files('qubes_menu') /
-                      'qubes-menu.glade')
-        with importlib.resources.as_file(glade_path) as path:
-            self.builder.add_from_file(str(path))
+        if self.use_resources:
+            self.builder.add_from_resource(
+                RESOURCE_PREFIX + '/qubes-menu.glade')
+        else:
+            glade_path = PACKAGE_FILES / 'qubes-menu.glade'
+            with importlib.resources.as_file(glade_path) as path:
+                self.builder.add_from_file(str(path))
 
         self.main_window = self.builder.get_object('main_window')
         self.main_notebook = self.builder.get_object('main_notebook')
 
-        self.main_window.set_events(Gdk.EventMask.FOCUS_CHANGE_MASK)
+        self.main_window.add_events(Gdk.EventMask.FOCUS_CHANGE_MASK |
+                                    Gdk.EventMask.KEY_PRESS_MASK)
         self.main_window.connect('focus-out-event', self._focus_out)
-        self.main_window.connect('key_press_event', self._key_press)
+        self.main_window.connect('key_press_event', self._key_pressed)
         self.add_window(self.main_window)
-        self.desktop_file_manager = DesktopFileManager(self.qapp)
-        self.vm_manager = VMManager(self.qapp, self.dispatcher)
+        # page factories use local references, which (unlike the Optional
+        # attributes) are known not to be None
+        desktop_file_manager = DesktopFileManager(self.qapp)
+        vm_manager = VMManager(self.qapp, self.dispatcher)
+        self.desktop_file_manager = desktop_file_manager
+        self.vm_manager = vm_manager
 
         self.handlers = {
-            'search_page': SearchPage(self.vm_manager, self.builder,
-                                      self.desktop_file_manager),
-            'app_page': AppPage(self.vm_manager, self.builder,
-                                self.desktop_file_manager),
-            'favorites_page': FavoritesPage(self.qapp, self.builder,
-                                            self.desktop_file_manager,
-                                            self.dispatcher, self.vm_manager),
-            'settings_page': SettingsPage(self.qapp, self.builder,
-                                          self.desktop_file_manager,
-                                          self.dispatcher)}
+            'search_page': lambda: SearchPage(vm_manager, self.builder,
+                                              desktop_file_manager),
+            'app_page': lambda: AppPage(vm_manager, self.builder,
+                                        desktop_file_manager),
+            'favorites_page': lambda: FavoritesPage(
+                self.qapp, self.builder, desktop_file_manager,
+                self.dispatcher, vm_manager),
+            'settings_page': lambda: SettingsPage(self.qapp, self.builder,
+                                                  desktop_file_manager,
+                                                  self.dispatcher)}
         self.power_button = self.builder.get_object('power_button')
         self.power_button.connect('clicked', self._do_power_button)
         self.main_notebook.connect('switch-page', self._handle_page_switch)
-        self.connect('shutdown', self.do_shutdown)
-
-        self.main_window.add_events(Gdk.EventMask.KEY_PRESS_MASK)
-        self.main_window.connect('key_press_event', self._key_pressed)
 
         self.load_style()
         Gtk.Settings.get_default().connect('notify::gtk-theme-name',
                                            self.load_style)
+        Gtk.IconTheme.get_default().connect('changed',
+                                            lambda *_: clear_icon_cache())
 
         self.load_settings()
 
@@ -343,16 +403,21 @@ class AppMenu(Gtk.Application):
 
     def load_style(self, *_args):
         """Load appropriate CSS stylesheet and associated properties."""
-        light_ref = (importlib.resources.files('qubes_menu') /
-                     'qubes-menu-light.css')
-        dark_ref = (importlib.resources.files('qubes_menu') /
-                    'qubes-menu-dark.css')
+        if self.use_resources:
+            load_theme(
+                self.main_window,
+                light_theme_path=RESOURCE_PREFIX + '/qubes-menu-light.css',
+                dark_theme_path=RESOURCE_PREFIX + '/qubes-menu-dark.css',
+                from_resource=True)
+        else:
+            light_ref = PACKAGE_FILES / 'qubes-menu-light.css'
+            dark_ref = PACKAGE_FILES / 'qubes-menu-dark.css'
 
-        with importlib.resources.as_file(light_ref) as light_path, \
-                importlib.resources.as_file(dark_ref) as dark_path:
-            load_theme(self.main_window,
-                       light_theme_path=str(light_path),
-                       dark_theme_path=str(dark_path))
+            with importlib.resources.as_file(light_ref) as light_path, \
+                    importlib.resources.as_file(dark_ref) as dark_path:
+                load_theme(self.main_window,
+                           light_theme_path=str(light_path),
+                           dark_theme_path=str(dark_path))
 
         label = Gtk.Label()
         style_context: Gtk.StyleContext = label.get_style_context()
@@ -379,7 +444,8 @@ class AppMenu(Gtk.Application):
             bool(local_vm.features.get(SORT_RUNNING_FEATURE, False))
 
         for handler in self.handlers.values():
-            handler.set_sorting_order(self.sort_running)
+            if isinstance(handler, MenuPage):
+                handler.set_sorting_order(self.sort_running)
 
     def _update_settings(self, vm, _event, **_kwargs):
         if not str(vm) == self.qapp.local_name:
@@ -389,14 +455,29 @@ class AppMenu(Gtk.Application):
 
     @staticmethod
     def _rgba_color_to_hex(color: Gdk.RGBA):
-        return '#' + ''.join([f'{int(c*255):0>2x}'
-                              for c in (color.red, color.green, color.blue)])
+        # pylint: disable=consider-using-f-string
+        return '#%02x%02x%02x' % (int(color.red * 255),
+                                  int(color.green * 255),
+                                  int(color.blue * 255))
 
     def _key_pressed(self, _widget, event_key: Gdk.EventKey):
-        """If user presses a non-control key, move to search."""
+        """
+        Keypress handler, to allow closing the menu with an ESC key and to fix
+        some issues with space (as we have search by default, we should not
+        react to space with launching an app). If user presses a non-control
+        key, move to search.
+        """
+        if event_key.keyval == Gdk.KEY_Escape:
+            self.hide_menu()
+            return True
+        if event_key.keyval == Gdk.KEY_space:
+            if not isinstance(self.get_active_window().get_focus(),
+                              Gtk.SearchEntry):
+                return True
+            return False
         if Gdk.keyval_to_unicode(event_key.keyval) > 32 or \
                 event_key.keyval == Gdk.KEY_BackSpace:
-            search_page = self.handlers.get('search_page')
+            search_page = self._get_page('search_page')
             if not isinstance(search_page, SearchPage):
                 return False
 
@@ -410,14 +491,36 @@ class AppMenu(Gtk.Application):
 
         return False
 
-    def _handle_page_switch(self, _widget, page, _page_num):
+    def _handle_page_switch(self, _widget, page, page_num):
         """
         On page switch some things need to happen, mostly cleaning any old
         selections/menu options highlighted.
         """
-        page_handler = self.handlers.get(page.get_name())
-        if page_handler:
-            page_handler.initialize_page()
+        page_name = page.get_name()
+        if page_name in self.handlers:
+            self._get_page(page_name, initialize=False).initialize_page()
+        else:
+            # pages that do not reset on switch (search) still need to be
+            # constructed the first time they are shown
+            self._get_page([k for k, v in PAGE_NUMS.items()
+                            if v == page_num][0])
+
+    def _get_page(self, page_name: str, initialize: bool = True) -> MenuPage:
+        """
+        Get the handler of a given page; pages are constructed (and
+        initialized) only when they are first needed.
+        :param page_name: name of the page, as in PAGE_NUMS
+        :param initialize: whether a newly constructed page should be
+        initialized; False if the caller initializes it anyway
+        """
+        page = self.handlers[page_name]
+        if not isinstance(page, MenuPage):
+            page = page()
+            page.set_sorting_order(self.sort_running)
+            if initialize:
+                page.initialize_page()
+            self.handlers[page_name] = page
+        return page
 
 
 def main():
@@ -432,7 +535,20 @@ def main():
     qapp = qubesadmin.Qubes()
     dispatcher = qubesadmin.events.EventsDispatcher(qapp)
     app = AppMenu(qapp, dispatcher)
-    app.run(sys.argv)
+
+    # let gbulb's event loop drive Gtk.Application.run, so that asyncio tasks
+    # (such as the event dispatcher) and Gtk share a single main loop; if
+    # another instance is already running, this will only forward
+    # the command line to it and exit
+    loop = cast(gbulb.glib_events.GLibEventLoop, asyncio.get_event_loop())
+    loop.run_forever(application=app, argv=sys.argv)
+    # background tasks were cancelled on shutdown; let them finish, so that
+    # they are not destroyed while still pending
+    pending_tasks = [task for task in app.tasks if not task.done()]
+    if pending_tasks:
+        loop.run_until_complete(
+            asyncio.gather(*pending_tasks, return_exceptions=True))
+    return app.exit_code
 
 
 if __name__ == '__main__':
@@ -20,15 +20,16 @@
 """
 Various custom Gtk widgets used in Qubes App Menu.
 """
-import subprocess
+import enum
+from typing import Callable, Iterable, Optional, Set
 
 from . import constants
-from .utils import load_icon
+from .utils import load_icon, get_icon_size
 from .vm_manager import VMEntry
 
 import gi
 gi.require_version('Gtk', '3.0')
-from gi.repository import Gtk, Gdk, GLib, Pango
+from gi.repository import Gtk, Gdk, Gio, GLib, Pango
 
 
 class LimitedWidthLabel(Gtk.Label):
@@ -54,6 +55,8 @@ class HoverEventBox(Gtk.EventBox):
         super().__init__()
         self.mouse = False
         self.focus_widget = focus_widget
+        # id of the pending hover timeout, 0 if there is none
+        self._hover_source_id = 0
 
         self.add_events(Gdk.EventMask.ENTER_NOTIFY_MASK)
         self.add_events(Gdk.EventMask.LEAVE_NOTIFY_MASK)
@@ -62,16 +65,22 @@ class HoverEventBox(Gtk.EventBox):
 
     def _enter_event(self, *_args):
         self.mouse = True
-        GLib.timeout_add(constants.HOVER_TIMEOUT, self._select_me)
+        if self._hover_source_id:
+            return
+        self._hover_source_id = GLib.timeout_add(constants.HOVER_TIMEOUT,
+                                                 self._select_me)
 
     def _leave_event(self, *_args):
         self.mouse = False
+        if self._hover_source_id:
+            GLib.source_remove(self._hover_source_id)
+            self._hover_source_id = 0
 
     def _select_me(self, *_args):
-        if not self.mouse:
-            return False
-        self.focus_widget.grab_focus()
-        return True
+        self._hover_source_id = 0
+        if self.mouse:
+            self.focus_widget.grab_focus()
+        return False
 
 
 class HoverListBox(Gtk.ListBoxRow):
@@ -105,16 +114,28 @@ class SelfAwareMenu(Gtk.Menu):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.get_style_context().add_class('right_menu')
-        self.connect('realize', self._add_to_open)
-        self.connect('deactivate', self._remove_from_open)
+        # the menu is mapped on every popup and unmapped on every popdown
+        self.connect('map', self._add_to_open)
+        self.connect('unmap', self._remove_from_open)
 
-    @staticmethod
-    def _add_to_open(*_args):
-        SelfAwareMenu.OPEN_MENUS += 1
+    @classmethod
+    def _add_to_open(cls, *_args):
+        cls._change_open_count(1)
+
+    @classmethod
+    def _remove_from_open(cls, *_args):
+        cls._change_open_count(-1)
 
     @staticmethod
-    def _remove_from_open(*_args):
-        SelfAwareMenu.OPEN_MENUS -= 1
+    def _change_open_count(delta: int):
+        # the counter is kept on SelfAwareMenu and not on subclasses, and
+        # it can never go below zero
+        SelfAwareMenu.OPEN_MENUS = max(0, SelfAwareMenu.OPEN_MENUS + delta)
+
+    @classmethod
+    def any_open(cls) -> bool:
+        """Is any menu currently open?"""
+        return SelfAwareMenu.OPEN_MENUS > 0
 
 
 class NetworkIndicator(Gtk.Box):
@@ -131,7 +152,7 @@ class NetworkIndicator(Gtk.Box):
         self.network_off: Gtk.Image = Gtk.Image.new_from_pixbuf(
             load_icon('qappmenu-networking-no', self.icon_size))
 
-        _, height, _ = Gtk.icon_size_lookup(self.icon_size)
+        _, height = get_icon_size(self.icon_size)
         self.network_on.set_size_request(-1, height * 1.3)
         self.network_off.set_size_request(-1, height * 1.3)
 
@@ -176,11 +197,47 @@ class SettingsEntry(Gtk.ListBoxRow):
 
     def run_app(self, vm):
         """Run settings for specified vm."""
-        # pylint: disable=consider-using-with
-        subprocess.Popen(
-            ['qubes-vm-settings', vm.name], stdin=subprocess.DEVNULL)
+        Gio.Subprocess.new(['qubes-vm-settings', vm.name],
+                           Gio.SubprocessFlags.NONE)
         self.get_toplevel().get_application().hide_menu()
 
+
+# lists whose rows changed since they were last re-sorted and re-filtered
+_LISTS_TO_REFRESH: Set[Gtk.ListBox] = set()
+
+
+def _schedule_list_refresh(listbox: Gtk.ListBox):
+    """
+    Re-sort and re-filter the list (and drop its selection) on idle;
+    requests made for any number of rows before that happens are coalesced
+    into a single refresh per list.
+    """
+    if not _LISTS_TO_REFRESH:
+        GLib.idle_add(_refresh_lists)
+    _LISTS_TO_REFRESH.add(listbox)
+
+
+def _refresh_lists():
+    """Refresh all lists scheduled with _schedule_list_refresh."""
+    listboxes = list(_LISTS_TO_REFRESH)
+    _LISTS_TO_REFRESH.clear()
+    for listbox in listboxes:
+        listbox.invalidate_sort()
+        listbox.invalidate_filter()
+        listbox.select_row(None)
+    return False
+
+
+class RowUpdate(enum.IntFlag):
+    """Kinds of VMRow updates, see VMRow.update_contents"""
+    NONE = 0
+    POWER_STATE = enum.auto()
+    LABEL = enum.auto()
+    HAS_NETWORK = enum.auto()
+    TYPE = enum.auto()
+    ALL = POWER_STATE | LABEL | HAS_NETWORK | TYPE
+
+
 class VMRow(HoverListBox):
     """
     Helper widget representing a VM row.
@@ -192,6 +249,12 @@ class VMRow(HoverListBox):
         super().__init__()
         self.vm_entry = vm_entry
         self.vm_name = vm_entry.vm_name
+        # cached, as it is used very often by sort functions
+        self._sort_key: str = vm_entry.sort_name
+        # updates requested, but not yet performed, and id of the idle
+        # callback that will perform them (0 if none is scheduled)
+        self._pending_updates = RowUpdate.NONE
+        self._update_source_id = 0
         self.get_style_context().add_class('vm_entry')
 
         self.icon_img = Gtk.Image()
@@ -209,8 +272,40 @@ class VMRow(HoverListBox):
         self.label = Gtk.Label(label=self.vm_entry.vm_name)
         self.main_box.pack_start(self.label, False, False, 2)
 
-        self.update_contents(update_power_state=True, update_label=True,
-                             update_has_network=True, update_type=True)
+        self._apply_updates(RowUpdate.ALL)
+
+    @classmethod
+    def bulk_populate(cls, listbox: Gtk.ListBox,
+                      vm_entries: Iterable[VMEntry],
+                      sort_func: Optional[Callable] = None,
+                      filter_func: Optional[Callable] = None):
+        """
+        Create rows for all provided VMEntries and add them to the listbox.
+        Sorting and filtering are suspended while rows are added, and
+        performed once at the end, with provided functions.
+        :param listbox: Gtk.ListBox to populate
+        :param vm_entries: VMEntry objects to create rows for
+        :param sort_func: sort function to be used by the listbox
+        :param filter_func: filter function to be used by the listbox
+        """
+        listbox.set_sort_func(None)
+        listbox.set_filter_func(None)
+        for vm_entry in vm_entries:
+            cls.add_to_list(listbox, vm_entry)
+        listbox.set_sort_func(sort_func)
+        listbox.set_filter_func(filter_func)
+
+    @classmethod
+    def add_to_list(cls, listbox: Gtk.ListBox, vm_entry: VMEntry) -> 'VMRow':
+        """
+        Create a row for the provided VMEntry, register it with the entry
+        (so it gets updated on VM changes) and add it to the listbox.
+        """
+        vm_row = cls(vm_entry)
+        vm_row.show_all()
+        vm_entry.entries.append(vm_row)
+        listbox.add(vm_row)
+        return vm_row
 
     def update_style(self, update_power_state: bool = True):
         """Update own style, based on whether VM is running or not and
@@ -238,7 +333,9 @@ class VMRow(HoverListBox):
                         update_type=False):
         """
         Update own contents (or related widgets, if applicable) based on state
-        change.
+        change. Updates are not performed immediately, but on idle, so that
+        a burst of state changes (e.g. many VMs shutting down) results in
+        a single update of each row and a single re-sort of each list.
         :param update_power_state: whether to update if VM is running or not
         :param update_label: whether label (vm icon) should be updated
         :param update_has_network: whether VM networking state should be
@@ -246,43 +343,78 @@ class VMRow(HoverListBox):
         :param update_type: whether VM type should be updated
         :return:
         """
+        updates = RowUpdate.NONE
+        if update_power_state:
+            updates |= RowUpdate.POWER_STATE
         if update_label:
+            updates |= RowUpdate.LABEL
+        if update_has_network:
+            updates |= RowUpdate.HAS_NETWORK
+        if update_type:
+            updates |= RowUpdate.TYPE
+        if not updates:
+            return
+
+        self._pending_updates |= updates
+        if not self._update_source_id:
+            self._update_source_id = GLib.idle_add(self._flush_updates)
+
+    def _flush_updates(self):
+        updates = self._pending_updates
+        self._pending_updates = RowUpdate.NONE
+        self._update_source_id = 0
+        self._apply_updates(updates)
+        return False
+
+    def _apply_updates(self, updates: RowUpdate):
+        """Perform actual updates, see update_contents."""
+        update_power_state = bool(updates & RowUpdate.POWER_STATE)
+        if updates & RowUpdate.LABEL:
             icon_vm = load_icon(self.vm_entry.vm_icon_name)
             self.icon_img.set_from_pixbuf(icon_vm)
-        if update_type or update_power_state:
+        if updates & RowUpdate.TYPE:
+            self._sort_key = self.vm_entry.sort_name
+        if updates & RowUpdate.TYPE or update_power_state:
             self.update_style(update_power_state)
             if self.get_parent():
-                self.get_parent().invalidate_sort()
-                self.get_parent().invalidate_filter()
-                self.get_parent().select_row(None)
-        if update_has_network:
+                _schedule_list_refresh(self.get_parent())
+        if updates & RowUpdate.HAS_NETWORK:
             if self.is_selected() and self.get_parent():
-                self.get_parent().select_row(None)
-                self.get_parent().select_row(self)
-        self.main_box.show_all()
+                # let the list (and the page showing network state of the
+                # selected VM) know the selected row changed, without
+                # actually deselecting and reselecting it
+                self.get_parent().emit('row-selected', self)
+        # on initial build, the row is shown when it is added to a list
+        if self.get_parent():
+            self.main_box.show_all()
 
     @property
     def sort_order(self):
         """
         Helper property exposing desired sort order.
         """
-        return self.vm_entry.sort_name
+        return self._sort_key
+
+
+def compare_rows(row: Gtk.ListBoxRow, other_row: Gtk.ListBoxRow) -> int:
+    """
+    Compare two VM rows (VMRow or AnyVMRow) by their sort order; returns
+    a negative number, zero or a positive number, as expected from
+    Gtk.ListBox sort functions.
+    """
+    key = row.sort_order
+    other_key = other_row.sort_order
+    return (key > other_key) - (key < other_key)
 
 
 class SearchVMRow(VMRow):
     """VM Row used for the Search tab."""
-    def update_contents(self,
-                        update_power_state=False,
-                        update_label=False,
-                        update_has_network=False,
-                        update_type=False):
+    def _apply_updates(self, updates: RowUpdate):
         """
-        Search rows do not show power state.
+        Search rows do not show power state or networking.
         """
-        super().update_contents(update_power_state=False,
-                                update_label=update_label,
-                                update_has_network=False,
-                                update_type=update_type)
+        super()._apply_updates(
+            updates & ~(RowUpdate.POWER_STATE | RowUpdate.HAS_NETWORK))
 
 
 class AnyVMRow(HoverListBox):
@@ -38,17 +38,20 @@ from . import constants
 
 logger = logging.getLogger('qubes-appmenu')
 
+# Exec field codes that are dropped from the command line
+IGNORED_FIELD_CODES = frozenset({'%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N',
+                                 '%v', '%m', '%k'})
+
 
 def exec_parse(desktop_entry: xdg.DesktopEntry.DesktopEntry):
     """
     Parse Exec field according to specification and return an already-split
-    exec command, ready to be used in subprocess.Popen et al.
+    exec command, ready to be used in Gio.Subprocess et al.
     """
     split_str = shlex.split(desktop_entry.getExec())
     result = []
     for s in split_str:
-        if s in ['%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%v',
-                 '%m', '%k']:
+        if s in IGNORED_FIELD_CODES:
             continue
         if s == '%i' and desktop_entry.getIcon():
             result.extend(['--icon', desktop_entry.getIcon()])
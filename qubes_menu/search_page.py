@@ -21,7 +21,7 @@
 from typing import Dict, Optional, Set, Union
 
 from .desktop_file_manager import DesktopFileManager
-from .custom_widgets import SearchVMRow, AnyVMRow
+from .custom_widgets import SearchVMRow, AnyVMRow, compare_rows
 from .app_widgets import SearchAppEntry
 from .vm_manager import VMEntry, VMManager
 from .page_handler import MenuPage
@@ -121,13 +121,14 @@ class SearchPage(MenuPage):
         self.app_list.connect('row-activated', self._app_clicked)
 
         self.vm_list.add(AnyVMRow())
-        vm_manager.register_new_vm_callback(self._vm_callback)
-        self.vm_list.set_filter_func(self._is_vm_fitting)
+        SearchVMRow.bulk_populate(self.vm_list, vm_manager.vms.values(),
+                                  sort_func=self._sort_vms,
+                                  filter_func=self._is_vm_fitting)
+        vm_manager.register_new_vm_callback(self._vm_callback,
+                                            call_for_existing=False)
 
         self.app_list.set_sort_func(self._sort_apps)
-        self.vm_list.set_sort_func(self._sort_vms)
         self.app_list.invalidate_sort()
-        self.vm_list.invalidate_sort()
 
         self.recent_list: Gtk.ListBox = builder.get_object('search_recent_list')
 
@@ -164,12 +165,9 @@ class SearchPage(MenuPage):
         Callback to be performed on all newly loaded VMEntry instances.
         """
         if vm_entry:
-            vm_row = SearchVMRow(vm_entry)
-            vm_row.show_all()
-            vm_entry.entries.append(vm_row)
-            self.vm_list.add(vm_row)
-            self.vm_list.invalidate_filter()
-            self.vm_list.invalidate_sort()
+            # the listbox inserts the row at its sorted position and filters
+            # it, so there is no need to re-sort or re-filter all rows
+            SearchVMRow.add_to_list(self.vm_list, vm_entry)
 
     def _do_search(self, *_args):
         has_search = bool(self.search_entry.get_text())
@@ -229,7 +227,7 @@ class SearchPage(MenuPage):
                 if vmentry.vm_entry.power_state == "Running":
                     return -1
                 return 1
-        return vmentry.sort_order > other_entry.sort_order
+        return compare_rows(vmentry, other_entry)
 
     def _sort_apps(self, appentry: SearchAppEntry, other_entry: SearchAppEntry):
         """
@@ -19,10 +19,15 @@
 # with this program; if not, see <http://www.gnu.org/licenses/>.
 from unittest import mock
 
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import GLib
+
 from ..desktop_file_manager import DesktopFileManager
 from ..vm_manager import VMManager
 from qubesadmin.tests.mock_app import MockDispatcher, MockQube
 from ..application_page import AppPage
+from ..custom_widgets import RowUpdate
 from ..settings_page import SettingsPage
 
 
@@ -87,6 +92,78 @@ def test_dispvm_parent_sorting(test_desktop_file_path, test_qapp, test_builder):
         assert False
 
 
+def test_app_page_vm_rows(test_desktop_file_path, test_qapp, test_builder):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(DesktopFileManager, 'desktop_dirs',
+                           [test_desktop_file_path]):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    app_page = AppPage(vm_manager, test_builder, desktop_file_manager)
+
+    def check_rows():
+        rows = app_page.vm_list.get_children()
+        # every VM has exactly one row
+        assert sorted(row.vm_name for row in rows) == sorted(vm_manager.vms)
+        for vm_entry in vm_manager.vms.values():
+            assert len(vm_entry.entries) == 1
+        # and rows are sorted
+        sort_keys = [row.sort_order for row in rows]
+        assert sort_keys == sorted(sort_keys)
+
+    check_rows()
+
+    # a newly added VM also gets a single row, in the correct place
+    test_qapp._qubes['aaa-new-vm'] = MockQube(name="aaa-new-vm",
+                                              qapp=test_qapp)
+    test_qapp.update_vm_calls()
+    vm_manager.load_vm_from_name('aaa-new-vm')
+
+    check_rows()
+    assert app_page.vm_list.get_children()[0].vm_name == 'aaa-new-vm'
+
+
+def test_app_page_vm_row_updates(test_desktop_file_path, test_qapp,
+                                 test_builder):
+    dispatcher = MockDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    with mock.patch.object(DesktopFileManager, 'desktop_dirs',
+                           [test_desktop_file_path]):
+        desktop_file_manager = DesktopFileManager(test_qapp)
+
+    app_page = AppPage(vm_manager, test_builder, desktop_file_manager)
+    app_page.set_sorting_order(True)
+
+    context = GLib.MainContext.default()
+    while context.iteration(False):
+        pass
+
+    row = [row for row in app_page.vm_list.get_children()
+           if row.vm_name == 'test-red'][0]
+    assert not row.get_style_context().has_class('running_vm')
+
+    # two changes in a row are handled with a single update, on idle
+    row.vm_entry.power_state = 'Transient'
+    source_id = row._update_source_id
+    row.vm_entry.power_state = 'Running'
+    assert row._update_source_id == source_id
+    assert row._pending_updates == RowUpdate.POWER_STATE
+    assert not row.get_style_context().has_class('running_vm')
+
+    while context.iteration(False):
+        pass
+
+    assert row._update_source_id == 0
+    assert row.get_style_context().has_class('running_vm')
+
+    # running VMs are sorted to the top
+    running = [r.vm_entry.power_state == 'Running'
+               for r in app_page.vm_list.get_children()]
+    assert running == sorted(running, reverse=True)
+
+
 def test_settings_app_page(test_desktop_file_path, test_qapp, test_builder):
     # a basic sanity test
     dispatcher = MockDispatcher(test_qapp)
@@ -17,9 +17,24 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
-from ..appmenu import AppMenu
+import importlib.resources
+import shutil
+import subprocess
+from typing import List
+from unittest import mock
+
+import pytest
+
+from ..appmenu import AppMenu, RESOURCE_PREFIX, register_resources
+from ..favorites_page import FavoritesPage
+from ..page_handler import MenuPage
+from ..search_page import SearchPage
 from qubesadmin.tests.mock_app import MockQubesComplete, MockDispatcher, MockQube
 
+import gi
+gi.require_version('Gtk', '3.0')
+from gi.repository import Gtk, GLib
+
 
 def test_app_menu_conffeatures():
     qapp = MockQubesComplete()
@@ -86,3 +101,65 @@ def test_appmenu_options():
 
     assert app_menu.initial_page == "favorites_page"
     assert app_menu.keep_visible
+
+
+def test_appmenu_lazy_pages():
+    qapp = MockQubesComplete()
+    qapp._qubes['dom0'].features['menu-sort-running'] = '1'
+    qapp.update_vm_calls()
+
+    dispatcher = MockDispatcher(qapp)
+    app_menu = AppMenu(qapp, dispatcher)
+
+    app_menu.perform_setup()
+
+    # pages are not constructed until they are needed
+    for page in app_menu.handlers.values():
+        assert not isinstance(page, MenuPage)
+
+    favorites_page = app_menu._get_page('favorites_page')
+    assert isinstance(favorites_page, FavoritesPage)
+    assert app_menu.handlers['favorites_page'] is favorites_page
+    # the same object is returned afterwards
+    assert app_menu._get_page('favorites_page') is favorites_page
+
+    # settings changes reach already constructed pages
+    search_page = app_menu._get_page('search_page')
+    assert isinstance(search_page, SearchPage)
+    assert search_page.sort_running
+
+
+@pytest.mark.skipif(not shutil.which('glib-compile-resources'),
+                    reason='glib-compile-resources not available')
+def test_appmenu_resources(tmp_path):
+    source_dir = importlib.resources.files('qubes_menu')
+    with importlib.resources.as_file(source_dir) as source_path:
+        subprocess.check_call([
+            'glib-compile-resources',
+            '--sourcedir=' + str(source_path),
+            '--target=' + str(tmp_path / 'qubes-menu.gresource'),
+            str(source_path / 'qubes-menu.gresource.xml')])
+
+    register_resources.cache_clear()
+    try:
+        with mock.patch('qubes_menu.appmenu.PACKAGE_FILES', tmp_path):
+            assert register_resources()
+    finally:
+        register_resources.cache_clear()
+
+    builder = Gtk.Builder()
+    builder.add_from_resource(RESOURCE_PREFIX + '/qubes-menu.glade')
+    assert builder.get_object('main_window')
+
+    css_errors: List[GLib.Error] = []
+
+    def _parsing_error(_provider, _section, error):
+        css_errors.append(error)
+
+    # this also checks that the base stylesheet, imported by both themes,
+    # is found in the bundle
+    for css_file in ('qubes-menu-light.css', 'qubes-menu-dark.css'):
+        provider = Gtk.CssProvider()
+        provider.connect('parsing-error', _parsing_error)
+        provider.load_from_resource(RESOURCE_PREFIX + '/' + css_file)
+    assert not css_errors
@@ -0,0 +1,46 @@
+# -*- encoding: utf8 -*-
+#
+# The Qubes OS Project, http://www.qubes-os.org
+#
+# Copyright (C) 2023 Marta Marczykowska-Górecka
+#                               <marmarta@invisiblethingslab.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation; either version 2.1 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along
+# with this program; if not, see <http://www.gnu.org/licenses/>.
+from ..custom_widgets import SelfAwareMenu
+
+
+def test_self_aware_menu_counter(monkeypatch):
+    # the counter is global, class-level state: restore it afterwards
+    monkeypatch.setattr(SelfAwareMenu, 'OPEN_MENUS', 0)
+    menu = SelfAwareMenu()
+    menu.show_all()
+    # mapping requires a realized widget; the menu is not popped up to avoid
+    # depending on pointer grabs
+    menu.realize()
+
+    # closing a menu that was not counted as open must not make the counter
+    # negative
+    menu._remove_from_open()
+    assert SelfAwareMenu.OPEN_MENUS == 0
+    assert not SelfAwareMenu.any_open()
+
+    # every popup of the same menu is counted, not only the first one
+    for _ in range(2):
+        menu.emit('map')
+        assert SelfAwareMenu.OPEN_MENUS == 1
+        assert SelfAwareMenu.any_open()
+
+        menu.emit('unmap')
+        assert SelfAwareMenu.OPEN_MENUS == 0
+        assert not SelfAwareMenu.any_open()
@@ -17,7 +17,7 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
-from ..utils import highlight_words
+from ..utils import highlight_words, load_icon, clear_icon_cache
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -67,3 +67,30 @@ def test_highlight_words():
     assert label_3.get_label() == \
            "A shape with <span>lion</span> body and the head of a man"
 
+
+def test_highlight_words_escape():
+    highlight_tag = '<span>'
+
+    label = Gtk.Label("Tom & Jerry <3")
+
+    highlight_words([label], ["jerry"], highlight_tag)
+    assert label.get_label() == "Tom &amp; <span>Jerry</span> &lt;3"
+    assert label.get_text() == "Tom & Jerry <3"
+
+    # text must survive re-highlighting
+    highlight_words([label], ["tom"], highlight_tag)
+    assert label.get_label() == "<span>Tom</span> &amp; Jerry &lt;3"
+
+
+def test_load_icon_cache():
+    icon_1 = load_icon('qappmenu-no-such-icon')
+    icon_2 = load_icon('qappmenu-no-such-icon')
+    assert icon_1 is icon_2
+
+    # different size means a different icon
+    icon_3 = load_icon('qappmenu-no-such-icon', None, 15)
+    assert icon_3 is not icon_1
+    assert icon_3.get_width() == 15
+
+    clear_icon_cache()
+    assert load_icon('qappmenu-no-such-icon') is not icon_1
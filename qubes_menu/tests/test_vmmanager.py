@@ -17,12 +17,13 @@
 #
 # You should have received a copy of the GNU Lesser General Public License along
 # with this program; if not, see <http://www.gnu.org/licenses/>.
+from typing import List
 
 import qubesadmin
 import qubesadmin.events
-from ..vm_manager import VMManager
+from ..vm_manager import VMManager, VMEntry
 from ..application_page import VMTypeToggle
-from qubesadmin.tests.mock_app import Property
+from qubesadmin.tests.mock_app import Property, MockQube
 
 
 def test_vm_manager(test_qapp):
@@ -109,3 +110,25 @@ def test_filter(test_qapp):
     assert VMTypeToggle._filter_appvms(entry_dvm_template)
     assert VMTypeToggle._filter_templatevms(entry_dvm_template)
     assert not VMTypeToggle._filter_service(entry_dvm_template)
+
+
+def test_vm_manager_new_vm_callback(test_qapp):
+    dispatcher = qubesadmin.events.EventsDispatcher(test_qapp)
+    vm_manager = VMManager(test_qapp, dispatcher)
+
+    all_vms: List[VMEntry] = []
+    new_vms: List[VMEntry] = []
+    vm_manager.register_new_vm_callback(all_vms.append)
+    vm_manager.register_new_vm_callback(new_vms.append,
+                                        call_for_existing=False)
+
+    # by default, callback is executed for all already loaded VMs
+    assert all_vms == list(vm_manager.vms.values())
+    assert not new_vms
+
+    test_qapp._qubes['new-vm'] = MockQube(name="new-vm", qapp=test_qapp)
+    test_qapp.update_vm_calls()
+    new_entry = vm_manager.load_vm_from_name('new-vm')
+
+    assert all_vms[-1] is new_entry
+    assert new_vms == [new_entry]
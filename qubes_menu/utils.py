@@ -20,7 +20,8 @@
 """
 Miscellaneous Qubes Menu utility functions.
 """
-from typing import List, Optional
+import functools
+from typing import List, Optional, Tuple
 
 import gi
 gi.require_version('Gtk', '3.0')
@@ -33,10 +34,41 @@ def load_icon(icon_name,
     """Load icon from provided name, if available. If not, attempt to treat
     provided name as a path. If icon not found in any of the above ways,
     load a blank icon of specified size.
+    Icons from the icon theme are cached and shared between callers (so
+    the returned pixbuf must not be modified); icons loaded from a path are
+    not, as the file might change.
     Returns GdkPixbuf.Pixbuf
     """
+    if isinstance(icon_name, str) and '/' not in icon_name:
+        return _load_theme_icon(icon_name, size, pixel_size)
+    return _load_icon(icon_name, size, pixel_size)
+
+
+@functools.lru_cache(maxsize=8)
+def get_icon_size(size: Gtk.IconSize) -> Tuple[int, int]:
+    """Get width and height (in pixels) of a given Gtk.IconSize."""
+    _, width, height = Gtk.icon_size_lookup(size)
+    return width, height
+
+
+def clear_icon_cache():
+    """Clear icon cache used by load_icon; should be called on icon
+    theme change."""
+    _load_theme_icon.cache_clear()
+
+
+@functools.lru_cache(maxsize=512)
+def _load_theme_icon(icon_name: str, size: Optional[Gtk.IconSize],
+                     pixel_size: Optional[int]):
+    return _load_icon(icon_name, size, pixel_size)
+
+
+def _load_icon(icon_name, size: Optional[Gtk.IconSize],
+               pixel_size: Optional[int]):
+    width: Optional[int]
+    height: Optional[int]
     if size:
-        _, width, height = Gtk.icon_size_lookup(size)
+        width, height = get_icon_size(size)
     else:
         width = pixel_size
         height = pixel_size
@@ -110,7 +142,7 @@ def highlight_words(labels: List[Gtk.Label], search_words: List[str],
     for label in labels:
         text = label.get_text()
         # remove existing highlighting
-        label.set_markup(text)
+        label.set_text(text)
         search_text = text.lower()
         found_intervals = []
         for word in search_words:
@@ -131,12 +163,19 @@ def highlight_words(labels: List[Gtk.Label], search_words: List[str],
             else:
                 result_intervals.append(interval)
 
-        for interval in reversed(result_intervals):
-            start, end = interval
-            text = text[:start] + hl_tag + \
-                   text[start:end] + '</span>' + text[end:]
-
-        label.set_markup(text)
+        # build the markup in a single pass; text outside of tags must be
+        # escaped, as it can contain characters such as &
+        markup = []
+        last_end = 0
+        for start, end in result_intervals:
+            markup.append(GLib.markup_escape_text(text[last_end:start]))
+            markup.append(hl_tag)
+            markup.append(GLib.markup_escape_text(text[start:end]))
+            markup.append('</span>')
+            last_end = end
+        markup.append(GLib.markup_escape_text(text[last_end:]))
+
+        label.set_markup(''.join(markup))
 
 
 def get_visible_child(widget: Gtk.Container, reverse=False):
@@ -156,11 +156,16 @@ class VMManager:
 
         self.register_events()
 
-    def register_new_vm_callback(self, func):
-        """Register a callback to be executed whenever a VM is added."""
+    def register_new_vm_callback(self, func, call_for_existing: bool = True):
+        """Register a callback to be executed whenever a VM is added.
+        :param func: callback, will receive a VMEntry as argument
+        :param call_for_existing: if True, the callback will be immediately
+        executed for all already loaded VMs
+        """
         self.new_vm_callbacks.append(func)
-        for entry in self.vms.values():
-            func(entry)
+        if call_for_existing:
+            for entry in self.vms.values():
+                func(entry)
 
     def load_vm_from_name(self, vm_name: str) -> Optional[VMEntry]:
         """Get a VM entry corresponding to a VM name"""
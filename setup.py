@@ -1,7 +1,31 @@
 #!/usr/bin/env python3
 ''' Setup.py file '''
+import os
+import subprocess
+
+import setuptools.command.build_py
 import setuptools.command.install
 
+# source directory of the menu package, independent of current directory
+MENU_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'qubes_menu')
+
+
+class BuildPyWithResources(setuptools.command.build_py.build_py):
+    """build_py that also compiles the GResource bundle for the menu; the
+    bundle is written to the build directory only, never to the source
+    tree"""
+    def run(self):
+        super().run()
+        target_dir = os.path.join(self.build_lib, 'qubes_menu')
+        self.mkpath(target_dir)
+        subprocess.check_call([
+            'glib-compile-resources',
+            '--sourcedir=' + MENU_SOURCE_DIR,
+            '--target=' + os.path.join(target_dir, 'qubes-menu.gresource'),
+            os.path.join(MENU_SOURCE_DIR, 'qubes-menu.gresource.xml')])
+
+
 setuptools.setup(name='qubes_menu',
                  version='0.1',
                  author='Invisible Things Lab',
@@ -10,6 +34,7 @@ setuptools.setup(name='qubes_menu',
                  license='GPL2+',
                  url='https://www.qubes-os.org/',
                  packages=["qubes_menu", "qubes_menu_settings"],
+                 cmdclass={'build_py': BuildPyWithResources},
                  entry_points={
                      'gui_scripts': [
                          'qubes-app-menu = qubes_menu.appmenu:main',